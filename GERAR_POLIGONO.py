@@ -5,7 +5,7 @@ Descrição: Aplicação para processar KMLs com pontos e gerar polígonos
 """
 
 import sys
-import subprocess
+import os
 import importlib.util
 
 # Função para verificar e instalar pacotes
@@ -14,12 +14,11 @@ def check_and_install_packages():
     required_packages = [
         'streamlit',
         'shapely',
-        'simplekml',
         'numpy',
         'pyproj',
         'folium',
-        'streamlit_folium',
-        'pandas'
+        'pandas',
+        'lxml'
     ]
     
     missing_packages = []
@@ -43,24 +42,27 @@ def check_and_install_packages():
     
     return True
 
-# Verificar dependências antes de continuar
-if not check_and_install_packages():
+# Verificação de dependências opcional (execute com DEPCHECK=1 para ativar).
+# Na execução normal os imports abaixo falham naturalmente com ImportError,
+# que o Streamlit já exibe com clareza — sem pagar 8 find_spec por rerun.
+if os.environ.get("DEPCHECK") and not check_and_install_packages():
     print("\n❌ Por favor, instale as dependências faltantes e execute novamente.")
     sys.exit(1)
 
 # Agora importamos os pacotes
 import streamlit as st
 import xml.etree.ElementTree as ET
-import math
 import numpy as np
+from dataclasses import dataclass, field
+import shapely
 from shapely.geometry import Polygon, Point
 from shapely.ops import unary_union
-import simplekml
-import tempfile
-import os
-from pyproj import Transformer
+import io
+from concurrent.futures import ThreadPoolExecutor
+from pyproj import CRS, Transformer
 import folium
-from streamlit_folium import folium_static
+from folium.plugins import MarkerCluster
+from lxml import etree
 import pandas as pd
 
 # Configuração da página
@@ -114,177 +116,365 @@ with st.sidebar:
     )
 
 # Funções principais
-def parse_kml(file_content):
-    """Extrai placemarks do tipo Point de um arquivo KML"""
+@dataclass
+class Placemarks:
+    """Placemarks em formato colunar: arrays NumPy para os números,
+    listas Python apenas para os textos"""
+    names: list
+    descriptions: list
+    lats: np.ndarray
+    lons: np.ndarray
+    coords: list = field(default_factory=list)  # strings originais do KML
+
+    def __len__(self):
+        return len(self.names)
+
+@st.cache_data(show_spinner=False)
+def parse_kml(file_bytes):
+    """Extrai placemarks do tipo Point de um arquivo KML (com cache por conteúdo)"""
     try:
-        # Parse do KML
-        tree = ET.parse(file_content)
-        root = tree.getroot()
-        
         # Namespace do KML
         namespace = {'kml': 'http://www.opengis.net/kml/2.2'}
-        
-        placemarks = []
-        
-        for placemark in root.findall('.//kml:Placemark', namespace):
-            point = placemark.find('.//kml:Point/kml:coordinates', namespace)
+
+        names = []
+        descriptions = []
+        coord_texts = []
+        coord_pairs = []
+
+        # iterparse processa o arquivo em streaming: cada Placemark é
+        # extraído e liberado, sem materializar a árvore inteira na memória
+        for event, elem in ET.iterparse(io.BytesIO(file_bytes), events=('end',)):
+            if not elem.tag.endswith('}Placemark'):
+                continue
+
+            point = elem.find('.//kml:Point/kml:coordinates', namespace)
             if point is not None:
                 # Extrair nome
-                name_elem = placemark.find('kml:name', namespace)
+                name_elem = elem.find('kml:name', namespace)
                 name = name_elem.text if name_elem is not None else "Sem nome"
-                
+
                 # Extrair descrição se existir
-                desc_elem = placemark.find('kml:description', namespace)
+                desc_elem = elem.find('kml:description', namespace)
                 description = desc_elem.text if desc_elem is not None else ""
-                
-                # Extrair coordenadas
+
+                # Extrair coordenadas (conversão numérica fica para depois)
                 coords_text = point.text.strip()
                 coords = coords_text.split(',')
-                
+
                 if len(coords) >= 2:
-                    lon = float(coords[0])
-                    lat = float(coords[1])
-                    
-                    placemarks.append({
-                        'name': name,
-                        'description': description,
-                        'lat': lat,
-                        'lon': lon,
-                        'coords': coords_text
-                    })
-        
-        return placemarks, root
+                    names.append(name)
+                    descriptions.append(description)
+                    coord_texts.append(coords_text)
+                    coord_pairs.append(coords[:2])
+
+            # Liberar o elemento já processado para manter a memória plana
+            elem.clear()
+
+        if not coord_pairs:
+            return Placemarks([], [], np.empty(0), np.empty(0))
+
+        # Converter todas as strings de coordenadas numa única passada em C
+        arr = np.array(coord_pairs, dtype=np.float64)
+
+        return Placemarks(names, descriptions, arr[:, 1], arr[:, 0], coord_texts)
     except Exception as e:
         st.error(f"Erro ao processar KML: {str(e)}")
-        return None, None
+        return None
+
+def local_aeqd_transformers(center_lat, center_lon):
+    """Cria transformadores ida/volta entre WGS84 e um CRS local em metros"""
+    # Projeção azimutal equidistante centrada nos pontos: distâncias exatas
+    # em metros na vizinhança, sem a aproximação de 111 km/grau
+    crs_local = CRS.from_proj4(f"+proj=aeqd +lat_0={center_lat} +lon_0={center_lon} +units=m")
+    fwd = Transformer.from_crs("EPSG:4326", crs_local, always_xy=True)
+    inv = Transformer.from_crs(crs_local, "EPSG:4326", always_xy=True)
+    return fwd, inv
+
+def _square_corners(xs, ys, radius_meters):
+    """Gera os cantos (N, 5) dos quadrados em metros, via broadcasting"""
+    # Somente aritmética NumPy: toda a iteração acontece em C, sem
+    # nenhum loop Python por ponto sobrando para compilar com JIT
+    r = float(radius_meters)
+    dx = np.array([-r, r, r, -r, -r])
+    dy = np.array([-r, -r, r, r, -r])
+    return xs[:, np.newaxis] + dx, ys[:, np.newaxis] + dy
+
+def create_square_polygons(lats, lons, radius_meters):
+    """Cria polígonos quadrados ao redor de todos os pontos de uma vez"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    # Projetar todos os pontos para um CRS local em metros numa só chamada
+    fwd, inv = local_aeqd_transformers(float(lats.mean()), float(lons.mean()))
+    xs, ys = fwd.transform(lons, lats)
+
+    # Montar os 4 cantos + vértice de fechamento em metros
+    corner_x, corner_y = _square_corners(np.asarray(xs), np.asarray(ys), radius_meters)
+
+    # Voltar para graus numa única chamada em lote ao PROJ
+    corner_lon, corner_lat = inv.transform(corner_x.ravel(), corner_y.ravel())
+
+    # Vértices na ordem (lat, lon), como o restante do código espera
+    vertices = np.stack(
+        [corner_lat.reshape(-1, 5), corner_lon.reshape(-1, 5)],
+        axis=-1
+    )
+
+    # shapely.polygons cria todas as geometrias numa única chamada em C
+    return list(shapely.polygons(vertices))
 
 def create_square_polygon(lat, lon, radius_meters):
     """Cria um polígono quadrado ao redor de um ponto"""
-    # Aproximação: 1 grau de latitude ≈ 111 km
-    lat_offset = radius_meters / 111000
-    
-    # Correção para longitude baseada na latitude
-    lon_offset = radius_meters / (111000 * math.cos(math.radians(lat)))
-    
-    # Criar vértices do quadrado
-    vertices = [
-        (lat - lat_offset, lon - lon_offset),
-        (lat - lat_offset, lon + lon_offset),
-        (lat + lat_offset, lon + lon_offset),
-        (lat + lat_offset, lon - lon_offset),
-        (lat - lat_offset, lon - lon_offset)
-    ]
-    
-    return Polygon(vertices)
+    return create_square_polygons([lat], [lon], radius_meters)[0]
 
 def merge_intersecting_polygons(polygons):
     """Une polígonos que se intersectam"""
     if not polygons:
         return []
-    
+
     if len(polygons) == 1:
-        return polygons
-    
+        return list(polygons)
+
     try:
-        # Usar unary_union para unir todos os polígonos
-        merged = unary_union(polygons)
-        
-        # Se o resultado for MultiPolygon, separar em polígonos individuais
-        if merged.geom_type == 'MultiPolygon':
-            return list(merged.geoms)
-        elif merged.geom_type == 'Polygon':
-            return [merged]
-        else:
-            return []
+        geoms = np.asarray(polygons, dtype=object)
+
+        # Índice espacial: encontrar apenas os pares que realmente se tocam
+        tree = shapely.STRtree(geoms)
+        pairs = tree.query(geoms, predicate='intersects')
+
+        # Atalho para o caso comum de pontos esparsos: se só aparecem os
+        # pares (i, i), nenhum quadrado toca outro e não há o que unir
+        if pairs.shape[1] == geoms.size and (pairs[0] == pairs[1]).all():
+            return list(geoms)
+
+        # Union-find sobre os pares para agrupar polígonos conectados
+        parent = np.arange(geoms.size)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in pairs.T:
+            if i != j:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[rj] = ri
+
+        # Agrupar índices por componente conectado
+        clusters = {}
+        for idx in range(geoms.size):
+            clusters.setdefault(find(idx), []).append(idx)
+
+        # Separar grupos isolados (passam direto) dos que precisam de união
+        merged = []
+        cluster_geoms = []
+        for indices in clusters.values():
+            if len(indices) == 1:
+                merged.append(geoms[indices[0]])
+            else:
+                cluster_geoms.append(geoms[indices])
+
+        if cluster_geoms:
+            # union_all libera o GIL dentro do GEOS, então threads
+            # escalam de verdade ao unir grupos independentes em paralelo
+            if len(cluster_geoms) > 1:
+                with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    unions = list(executor.map(shapely.union_all, cluster_geoms))
+            else:
+                unions = [shapely.union_all(cluster_geoms[0])]
+
+            for union in unions:
+                if union.geom_type == 'MultiPolygon':
+                    merged.extend(union.geoms)
+                elif union.geom_type == 'Polygon':
+                    merged.append(union)
+
+        return merged
     except Exception as e:
         st.error(f"Erro ao unir polígonos: {str(e)}")
-        return polygons
+        return list(polygons)
+
+KML_NS = 'http://www.opengis.net/kml/2.2'
+
+def _kml_element(tag, **attrib):
+    """Cria um elemento lxml qualificado no namespace do KML"""
+    return etree.Element(f'{{{KML_NS}}}{tag}', attrib, nsmap={None: KML_NS})
+
+def _kml_sub(parent, tag):
+    return etree.SubElement(parent, f'{{{KML_NS}}}{tag}')
 
 def create_output_kml(polygons, placemarks, radius, color, opacity):
-    """Cria um novo KML com os polígonos processados"""
-    kml = simplekml.Kml()
-    
-    # Adicionar pontos originais (opcional)
-    for i, pm in enumerate(placemarks):
-        pnt = kml.newpoint(name=f"Original: {pm['name']}")
-        pnt.coords = [(pm['lon'], pm['lat'])]
-        pnt.style.iconstyle.color = simplekml.Color.blue
-        pnt.style.iconstyle.scale = 0.5
-    
-    # Adicionar polígonos processados
-    for i, poly in enumerate(polygons):
-        if poly.geom_type == 'Polygon':
-            coords = list(poly.exterior.coords)
-            
-            # Criar polígono no KML
-            pol = kml.newpolygon(name=f"Área {i+1}")
-            
-            # Converter cor hex para RGB
-            r = int(color[1:3], 16)
-            g = int(color[3:5], 16)
-            b = int(color[5:7], 16)
-            
-            # Configurar estilo
-            pol.style.linestyle.color = simplekml.Color.rgb(r, g, b)
-            pol.style.linestyle.width = 2
-            pol.style.polystyle.color = simplekml.Color.changealphaint(
-                int(opacity * 255), 
-                simplekml.Color.rgb(r, g, b)
-            )
-            
-            # Adicionar coordenadas (invertendo lat/lon para o KML)
-            kml_coords = [(lon, lat) for lat, lon in coords]
-            pol.outerboundaryis = kml_coords
-    
-    return kml
+    """Gera o KML com os polígonos processados como bytes, em streaming"""
+    # Converter cor hex para o formato aabbggrr do KML (uma vez)
+    r = int(color[1:3], 16)
+    g = int(color[3:5], 16)
+    b = int(color[5:7], 16)
+    line_color = f"ff{b:02x}{g:02x}{r:02x}"
+    fill_color = f"{int(opacity * 255):02x}{b:02x}{g:02x}{r:02x}"
+
+    # Estilos compartilhados: referenciados por styleUrl em vez de um
+    # bloco de estilo repetido por placemark
+    style_point = _kml_element('Style', id='ponto-original')
+    icon_style = _kml_sub(style_point, 'IconStyle')
+    _kml_sub(icon_style, 'color').text = 'ffff0000'  # azul
+    _kml_sub(icon_style, 'scale').text = '0.5'
+
+    style_area = _kml_element('Style', id='area')
+    line_style = _kml_sub(style_area, 'LineStyle')
+    _kml_sub(line_style, 'color').text = line_color
+    _kml_sub(line_style, 'width').text = '2'
+    poly_style = _kml_sub(style_area, 'PolyStyle')
+    _kml_sub(poly_style, 'color').text = fill_color
+
+    # Extrair as coordenadas de todos os contornos numa única chamada em C
+    exteriors = [poly.exterior for poly in polygons if poly.geom_type == 'Polygon']
+    if exteriors:
+        all_coords, ring_index = shapely.get_coordinates(
+            np.asarray(exteriors, dtype=object), return_index=True
+        )
+        # Inverter lat/lon para a ordem lon,lat do KML e quantizar para
+        # ~11 cm (6 casas decimais): precisão de sobra e arquivo bem menor
+        lonlat = np.round(all_coords[:, ::-1], 6)
+
+    # Escrita incremental: cada placemark é serializado e liberado na
+    # hora, sem montar a árvore completa do documento na memória
+    buf = io.BytesIO()
+    with etree.xmlfile(buf, encoding='utf-8') as xf:
+        xf.write_declaration()
+        with xf.element(f'{{{KML_NS}}}kml', nsmap={None: KML_NS}):
+            with xf.element(f'{{{KML_NS}}}Document'):
+                xf.write(style_point)
+                xf.write(style_area)
+
+                # Adicionar pontos originais (opcional)
+                for name, lat, lon in zip(placemarks.names, placemarks.lats, placemarks.lons):
+                    pm = _kml_element('Placemark')
+                    _kml_sub(pm, 'name').text = f"Original: {name}"
+                    _kml_sub(pm, 'styleUrl').text = '#ponto-original'
+                    point = _kml_sub(pm, 'Point')
+                    _kml_sub(point, 'coordinates').text = f"{round(lon, 6)},{round(lat, 6)},0"
+                    xf.write(pm)
+
+                # Adicionar polígonos processados
+                for i in range(len(exteriors)):
+                    coords = lonlat[ring_index == i]
+
+                    pm = _kml_element('Placemark')
+                    _kml_sub(pm, 'name').text = f"Área {i+1}"
+                    _kml_sub(pm, 'styleUrl').text = '#area'
+                    polygon = _kml_sub(pm, 'Polygon')
+                    outer = _kml_sub(polygon, 'outerBoundaryIs')
+                    ring = _kml_sub(outer, 'LinearRing')
+                    _kml_sub(ring, 'coordinates').text = ' '.join(
+                        f"{lon},{lat},0" for lon, lat in coords
+                    )
+                    xf.write(pm)
+
+    return buf.getvalue()
 
 def create_folium_map(polygons, placemarks, color, opacity):
     """Cria um mapa Folium para visualização"""
     if not polygons:
         return None
     
-    # Calcular centro do mapa
+    # Calcular centro do mapa (média vetorizada)
     if placemarks:
-        center_lat = sum(pm['lat'] for pm in placemarks) / len(placemarks)
-        center_lon = sum(pm['lon'] for pm in placemarks) / len(placemarks)
+        center_lat = float(placemarks.lats.mean())
+        center_lon = float(placemarks.lons.mean())
     else:
         center_lat, center_lon = 0, 0
-    
+
     # Criar mapa
     m = folium.Map(location=[center_lat, center_lon], zoom_start=15)
-    
-    # Adicionar pontos originais
-    for pm in placemarks:
-        folium.Marker(
-            [pm['lat'], pm['lon']],
-            popup=f"<b>{pm['name']}</b><br>{pm['description']}",
-            icon=folium.Icon(color='blue', icon='info-sign')
+
+    # Adicionar pontos originais agrupados: o cluster evita que milhares
+    # de marcadores individuais cheguem ao navegador de uma vez
+    if placemarks:
+        marker_cluster = MarkerCluster().add_to(m)
+        point_features = [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [round(lon, 6), round(lat, 6)]
+                },
+                "properties": {"name": name, "desc": desc}
+            }
+            for name, desc, lat, lon in zip(
+                placemarks.names, placemarks.descriptions,
+                placemarks.lats, placemarks.lons
+            )
+        ]
+
+        # Uma única camada GeoJSON com todos os pontos, em vez de um
+        # objeto folium.Marker por placemark
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": point_features},
+            marker=folium.Marker(icon=folium.Icon(color='blue', icon='info-sign')),
+            tooltip=folium.GeoJsonTooltip(fields=["name", "desc"], labels=False)
+        ).add_to(marker_cluster)
+
+    # Adicionar polígonos processados como uma única camada GeoJSON,
+    # em vez de um objeto folium.Polygon por área
+    exteriors = [poly.exterior for poly in polygons if poly.geom_type == 'Polygon']
+    if exteriors:
+        all_coords, ring_index = shapely.get_coordinates(
+            np.asarray(exteriors, dtype=object), return_index=True
+        )
+        # Ordem lon,lat do GeoJSON, quantizada para ~11 cm: HTML menor
+        # e menos trabalho de parse/render no Leaflet
+        lonlat = np.round(all_coords[:, ::-1], 6)
+
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [lonlat[ring_index == i].tolist()]
+                },
+                "properties": {"name": f"Área {i+1}"}
+            }
+            for i in range(len(exteriors))
+        ]
+
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            style_function=lambda feature: {
+                'color': color,
+                'weight': 2,
+                'fillColor': color,
+                'fillOpacity': opacity
+            },
+            popup=folium.GeoJsonPopup(fields=["name"], labels=False)
         ).add_to(m)
-    
-    # Adicionar polígonos processados
-    for i, poly in enumerate(polygons):
-        if poly.geom_type == 'Polygon':
-            coords = list(poly.exterior.coords)
-            # Inverter para (lat, lon)
-            folium_coords = [(lat, lon) for lat, lon in coords]
-            
-            folium.Polygon(
-                folium_coords,
-                popup=f"Área {i+1}",
-                color=color,
-                weight=2,
-                fill=True,
-                fill_color=color,
-                fill_opacity=opacity
-            ).add_to(m)
-    
+
     return m
 
+@st.cache_resource(show_spinner=False)
+def build_map_html(poly_wkb, pm_records, color, opacity):
+    """Monta o mapa Folium e renderiza o HTML uma única vez (com cache)"""
+    # Reconstruir as geometrias e placemarks a partir das entradas hasheáveis
+    polygons = list(shapely.from_wkb(np.asarray(poly_wkb, dtype=object)))
+    if pm_records:
+        names, descriptions, lats, lons = map(list, zip(*pm_records))
+    else:
+        names, descriptions, lats, lons = [], [], [], []
+    placemarks = Placemarks(names, descriptions, np.asarray(lats), np.asarray(lons))
+
+    m = create_folium_map(polygons, placemarks, color, opacity)
+    if m is None:
+        return None
+
+    # render() é a parte cara; com cache ela só roda quando os dados mudam
+    return m.get_root().render()
+
 # Interface principal
 if uploaded_file is not None:
-    # Processar arquivo
+    # Processar arquivo (cache: só re-analisa quando o conteúdo muda)
     with st.spinner("Processando arquivo KML..."):
-        placemarks, kml_root = parse_kml(uploaded_file)
+        placemarks = parse_kml(uploaded_file.getvalue())
     
     if placemarks:
         # Mostrar estatísticas
@@ -298,19 +488,20 @@ if uploaded_file is not None:
         
         # Mostrar tabela de placemarks
         with st.expander("📋 Lista de Placemarks Encontrados", expanded=False):
-            df = pd.DataFrame(placemarks)
-            df_display = df[['name', 'lat', 'lon']].copy()
-            df_display.columns = ['Nome', 'Latitude', 'Longitude']
+            df_display = pd.DataFrame({
+                'Nome': placemarks.names,
+                'Latitude': placemarks.lats,
+                'Longitude': placemarks.lons
+            })
             st.dataframe(df_display)
         
         # Botão para processar
         if st.button("🚀 Processar e Gerar Polígonos", type="primary"):
             with st.spinner("Gerando polígonos..."):
-                # Criar polígonos individuais
-                individual_polygons = []
-                for pm in placemarks:
-                    poly = create_square_polygon(pm['lat'], pm['lon'], raio)
-                    individual_polygons.append(poly)
+                # Criar todos os polígonos de uma vez (vetorizado)
+                individual_polygons = create_square_polygons(
+                    placemarks.lats, placemarks.lons, raio
+                )
                 
                 # Unir polígonos que se intersectam
                 merged_polygons = merge_intersecting_polygons(individual_polygons)
@@ -319,27 +510,16 @@ if uploaded_file is not None:
                 st.session_state['merged_polygons'] = merged_polygons
                 col2.metric("📐 Polígonos após união", len(merged_polygons))
                 
-                # Criar KML de saída
-                output_kml = create_output_kml(merged_polygons, placemarks, raio, cor_poligono, opacidade)
-                
-                # Salvar em arquivo temporário
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.kml') as tmp_file:
-                    output_kml.save(tmp_file.name)
-                    
-                    # Botão de download
-                    with open(tmp_file.name, 'rb') as f:
-                        kml_bytes = f.read()
-                    
-                    st.download_button(
-                        label="📥 Download KML Processado",
-                        data=kml_bytes,
-                        file_name="poligonos_processados.kml",
-                        mime="application/vnd.google-earth.kml+xml"
-                    )
-                
-                # Limpar arquivo temporário
-                os.unlink(tmp_file.name)
-                
+                # Criar KML de saída (já serializado em bytes, via streaming)
+                kml_bytes = create_output_kml(merged_polygons, placemarks, raio, cor_poligono, opacidade)
+
+                st.download_button(
+                    label="📥 Download KML Processado",
+                    data=kml_bytes,
+                    file_name="poligonos_processados.kml",
+                    mime="application/vnd.google-earth.kml+xml"
+                )
+
                 # Salvar no session state para visualização
                 st.session_state['placemarks'] = placemarks
                 st.success(f"✅ Processamento concluído! {len(merged_polygons)} polígono(s) gerado(s).")
@@ -352,16 +532,16 @@ if 'merged_polygons' in st.session_state and st.session_state['merged_polygons']
     st.markdown("---")
     st.header("🗺️ Visualização do Mapa")
     
-    # Criar e mostrar mapa
-    m = create_folium_map(
-        st.session_state['merged_polygons'],
-        st.session_state['placemarks'],
-        cor_poligono,
-        opacidade
-    )
-    
-    if m:
-        folium_static(m, width=1000, height=600)
+    # Criar e mostrar mapa (HTML em cache: só re-renderiza se os dados mudarem)
+    pms = st.session_state['placemarks']
+    poly_wkb = tuple(shapely.to_wkb(
+        np.asarray(st.session_state['merged_polygons'], dtype=object)
+    ))
+    pm_records = tuple(zip(pms.names, pms.descriptions, pms.lats, pms.lons))
+    map_html = build_map_html(poly_wkb, pm_records, cor_poligono, opacidade)
+
+    if map_html:
+        st.components.v1.html(map_html, width=1000, height=600)
         
         # Estatísticas adicionais
         st.markdown("### 📊 Estatísticas dos Polígonos")
@@ -369,20 +549,19 @@ if 'merged_polygons' in st.session_state and st.session_state['merged_polygons']
         with col1:
             st.metric("Total de polígonos", len(st.session_state['merged_polygons']))
         with col2:
-            # Calcular área aproximada
-            total_area = 0
-            for poly in st.session_state['merged_polygons']:
-                if poly.geom_type == 'Polygon':
-                    # Conversão aproximada de graus² para km²
-                    area_degrees = poly.area
-                    # Fator de conversão aproximado (considerando latitude média)
-                    avg_lat = sum(pm['lat'] for pm in st.session_state['placemarks']) / len(st.session_state['placemarks'])
-                    km_per_degree_lat = 111
-                    km_per_degree_lon = 111 * math.cos(math.radians(avg_lat))
-                    area_km2 = area_degrees * km_per_degree_lat * km_per_degree_lon
-                    total_area += area_km2
-            
-            st.metric("Área total aproximada", f"{total_area:.2f} km²")
+            # Calcular área exata: projetar todos os polígonos para o CRS
+            # local em metros e somar as áreas numa única chamada vetorizada
+            fwd, _ = local_aeqd_transformers(
+                float(pms.lats.mean()),
+                float(pms.lons.mean())
+            )
+            geoms = np.asarray(st.session_state['merged_polygons'], dtype=object)
+            coords = shapely.get_coordinates(geoms)
+            xs, ys = fwd.transform(coords[:, 1], coords[:, 0])
+            polys_m = shapely.set_coordinates(geoms.copy(), np.column_stack([xs, ys]))
+            total_area = float(shapely.area(polys_m).sum()) / 1e6
+
+            st.metric("Área total", f"{total_area:.2f} km²")
         with col3:
             st.metric("Polígonos originais", len(st.session_state['placemarks']))
 